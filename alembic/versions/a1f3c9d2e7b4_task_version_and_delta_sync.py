@@ -0,0 +1,63 @@
+"""Add tasks.version and delta-sync change_seq columns and tombstones
+
+Revision ID: a1f3c9d2e7b4
+Revises:
+Create Date: 2026-10-19 12:00:00.000000
+
+main.py still runs Base.metadata.create_all on startup, so on a fresh
+database these objects may already exist; each step checks first.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1f3c9d2e7b4'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+CHANGE_SEQ_TABLES = ("projects", "tasks", "comments")
+
+
+def _inspector():
+    return sa.inspect(op.get_bind())
+
+def _has_column(table: str, column: str) -> bool:
+    return column in {c["name"] for c in _inspector().get_columns(table)}
+
+def _has_index(table: str, index: str) -> bool:
+    return index in {i["name"] for i in _inspector().get_indexes(table)}
+
+def upgrade() -> None:
+    if not _has_column("tasks", "version"):
+        op.add_column("tasks", sa.Column("version", sa.Integer(), nullable=False, server_default="1"))
+
+    for table in CHANGE_SEQ_TABLES:
+        if not _has_column(table, "change_seq"):
+            op.add_column(table, sa.Column("change_seq", sa.BigInteger(), nullable=True))
+        if not _has_index(table, f"ix_{table}_change_seq"):
+            op.create_index(f"ix_{table}_change_seq", table, ["change_seq"])
+
+        # Existing rows get small, distinct sequence values (their ids) so a full
+        # sync returns them and they sort before anything written from now on.
+        op.execute(f"UPDATE {table} SET change_seq = id WHERE change_seq IS NULL")
+
+    if not _inspector().has_table("sync_tombstones"):
+        op.create_table(
+            "sync_tombstones",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("entity_type", sa.String(20), nullable=False),
+            sa.Column("entity_id", sa.Integer(), nullable=False),
+            sa.Column("project_id", sa.Integer(), nullable=False),
+            sa.Column("change_seq", sa.BigInteger(), nullable=False),
+        )
+        op.create_index("ix_sync_tombstones_id", "sync_tombstones", ["id"])
+        op.create_index("ix_sync_tombstones_change_seq", "sync_tombstones", ["change_seq"])
+
+def downgrade() -> None:
+    op.drop_table("sync_tombstones")
+    for table in CHANGE_SEQ_TABLES:
+        op.drop_index(f"ix_{table}_change_seq", table_name=table)
+        op.drop_column(table, "change_seq")
+    op.drop_column("tasks", "version")
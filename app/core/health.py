@@ -0,0 +1,137 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.core.redis_client import get_redis_client
+from app.database import engine
+
+
+def _probe_connect_args() -> dict:
+    if make_url(settings.DATABASE_URL).get_backend_name() == "postgresql":
+        return {"connect_timeout": max(1, int(settings.HEALTH_CHECK_TIMEOUT_SECONDS))}
+    return {}
+
+
+# Probes connect outside the app's pool: when the pool is exhausted, which is exactly what
+# readiness has to report, a pooled checkout would block for the whole pool_timeout.
+probe_engine = create_engine(settings.DATABASE_URL, poolclass=NullPool, connect_args=_probe_connect_args())
+
+
+def _check_database():
+    with probe_engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+
+def _check_redis():
+    get_redis_client().ping()
+
+
+def pool_status() -> dict:
+    """Connection pool usage for the primary engine"""
+    pool = engine.pool
+    checked_out = pool.checkedout()
+    capacity = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    return {
+        "checked_out": checked_out,
+        "capacity": capacity,
+        "exhausted": checked_out >= capacity
+    }
+
+
+class HealthProber:
+    """Probes dependencies on an interval so health endpoints never block the event loop."""
+
+    def __init__(self, interval: float, timeout: float):
+        self.interval = interval
+        self.timeout = timeout
+        self.result = {"status": "starting", "checked_at": None, "dependencies": {}}
+        self._task: Optional[asyncio.Task] = None
+        # One worker per dependency, so a hung check never holds up the others
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="health-probe")
+        self._running = {}
+
+    async def _probe(self, name: str, check) -> dict:
+        started = time.perf_counter()
+        running = self._running.get(name)
+        if running is not None and not running.done():
+            # The previous check is still stuck in its thread; report it rather than stack another
+            return {name: {"status": "down", "latency_ms": 0.0, "error": "previous probe still running"}}
+
+        future = asyncio.get_running_loop().run_in_executor(self._executor, check)
+        self._running[name] = future
+        try:
+            # shield() keeps the future pending until the thread really finishes
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.timeout)
+            status = "up"
+            error = None
+        except asyncio.TimeoutError:
+            status = "down"
+            error = f"timed out after {self.timeout}s"
+        except Exception as e:
+            status = "down"
+            error = str(e)
+
+        result = {"status": status, "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+        if error:
+            result["error"] = error
+        return {name: result}
+
+    async def run_once(self):
+        database, redis = await asyncio.gather(
+            self._probe("database", _check_database),
+            self._probe("redis", _check_redis)
+        )
+        pool = pool_status()
+
+        healthy = (database["database"]["status"] == "up" and
+                   redis["redis"]["status"] == "up" and
+                   not pool["exhausted"])
+
+        self.result = {
+            "status": "healthy" if healthy else "unhealthy",
+            "checked_at": time.time(),
+            "dependencies": {**database, **redis, "pool": pool}
+        }
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"Health probe failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def is_stale(self) -> bool:
+        checked_at = self.result["checked_at"]
+        return checked_at is None or time.time() - checked_at > self.interval * 3
+
+    def is_ready(self) -> bool:
+        """Ready when the last probe passed, is recent, and the pool has free connections right now"""
+        return (self.result["status"] == "healthy" and
+                not self.is_stale() and
+                not pool_status()["exhausted"])
+
+
+health_prober = HealthProber(
+    interval=settings.HEALTH_CHECK_INTERVAL_SECONDS,
+    timeout=settings.HEALTH_CHECK_TIMEOUT_SECONDS
+)
@@ -0,0 +1,261 @@
+import ipaddress
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import jwt
+from fastapi import HTTPException, Request, Response, status
+
+from app.core.config import settings
+from app.core.redis_client import get_redis_client
+from app.database import pool_wait_tracker
+
+# Atomic token bucket. Asks for up to ARGV[3] tokens, but only hands out more than one
+# while the bucket is at least half full, so local leases never starve a busy bucket.
+# Asking for 0 tokens only reports whether one is available, without touching the bucket.
+# Returns {granted, tokens_left, retry_after_seconds}; floats are strings because Lua
+# numbers are truncated to integers when returned to the client.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil then
+    tokens = capacity
+    ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+if requested == 0 then
+    if tokens >= 1 then
+        return {1, tostring(tokens), '0'}
+    end
+    return {0, tostring(tokens), tostring((1 - tokens) / rate)}
+end
+
+if tokens < capacity / 2 then
+    requested = 1
+end
+local granted = math.min(requested, math.floor(tokens))
+tokens = tokens - granted
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+
+local retry_after = 0
+if granted == 0 then
+    retry_after = (1 - tokens) / rate
+end
+return {granted, tostring(tokens), tostring(retry_after)}
+"""
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600}
+
+
+@dataclass
+class Limit:
+    capacity: int
+    period: int
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+    @classmethod
+    def parse(cls, spec: str) -> "Limit":
+        """Parse limits written as e.g. "5/minute" """
+        count, period = spec.split("/")
+        return cls(capacity=int(count), period=_PERIODS[period.strip()])
+
+
+@dataclass
+class _Lease:
+    tokens: int
+    remaining: float
+    expires_at: float
+
+
+class RateLimiter:
+    """Token buckets in Redis, with short in-process leases to skip round trips when under limit."""
+
+    def __init__(self, lease_fraction: float, lease_seconds: float):
+        self.lease_fraction = lease_fraction
+        self.lease_seconds = lease_seconds
+        self._leases = {}
+        self._lock = threading.Lock()
+        self._script = None
+
+    def _take_local(self, key: str) -> Optional[_Lease]:
+        with self._lock:
+            lease = self._leases.get(key)
+            if lease is None:
+                return None
+            if lease.tokens > 0 and lease.expires_at > time.monotonic():
+                lease.tokens -= 1
+                return lease
+            del self._leases[key]
+        return None
+
+    def hit(self, key: str, limit: Limit):
+        """Consume one token; returns (allowed, remaining, retry_after_seconds)"""
+        lease = self._take_local(key)
+        if lease:
+            return True, lease.remaining + lease.tokens, 0.0
+
+        lease_size = max(1, int(limit.capacity * self.lease_fraction))
+        granted, tokens_left, retry_after = self._run_script(key, limit, lease_size)
+        granted = int(granted)
+        tokens_left = float(tokens_left)
+
+        if granted == 0:
+            return False, 0.0, float(retry_after)
+
+        if granted > 1:
+            with self._lock:
+                self._leases[key] = _Lease(
+                    tokens=granted - 1,
+                    remaining=tokens_left,
+                    expires_at=time.monotonic() + self.lease_seconds
+                )
+        return True, tokens_left + granted - 1, 0.0
+
+    def peek(self, key: str, limit: Limit):
+        """Whether a token is available, without consuming it; returns (allowed, remaining, retry_after_seconds)"""
+        with self._lock:
+            lease = self._leases.get(key)
+            if lease is not None and lease.tokens > 0 and lease.expires_at > time.monotonic():
+                return True, lease.remaining + lease.tokens, 0.0
+
+        available, tokens_left, retry_after = self._run_script(key, limit, 0)
+        return int(available) == 1, float(tokens_left), float(retry_after)
+
+    def _run_script(self, key: str, limit: Limit, requested: int):
+        if self._script is None:
+            self._script = get_redis_client().register_script(TOKEN_BUCKET_SCRIPT)
+        return self._script(keys=[key], args=[limit.capacity, limit.rate, requested])
+
+
+rate_limiter = RateLimiter(
+    lease_fraction=settings.RATE_LIMIT_LOCAL_LEASE_FRACTION,
+    lease_seconds=settings.RATE_LIMIT_LOCAL_LEASE_SECONDS
+)
+
+
+_trusted_proxies = [ipaddress.ip_network(proxy, strict=False) for proxy in settings.TRUSTED_PROXIES]
+
+
+def _is_trusted_proxy(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in _trusted_proxies)
+
+
+def client_ip(request: Request) -> str:
+    """The caller's IP, read from X-Forwarded-For when the request came through a trusted proxy.
+
+    Walks the header right to left, skipping trusted proxies, so a client cannot
+    pick its own bucket by sending a forged X-Forwarded-For.
+    """
+    host = request.client.host if request.client else "unknown"
+    if not _is_trusted_proxy(host):
+        return host
+
+    forwarded = [hop.strip() for hop in request.headers.get("X-Forwarded-For", "").split(",") if hop.strip()]
+    for hop in reversed(forwarded):
+        if not _is_trusted_proxy(hop):
+            return hop
+    return forwarded[0] if forwarded else host
+
+
+def _principal(request: Request) -> str:
+    """The authenticated user if the request carries a valid token, otherwise the client IP"""
+    authorization = request.headers.get("Authorization", "")
+    if authorization.lower().startswith("bearer "):
+        try:
+            payload = jwt.decode(authorization[7:], settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+            if payload.get("sub"):
+                return f"user:{payload['sub']}"
+        except jwt.PyJWTError:
+            pass
+    return f"ip:{client_ip(request)}"
+
+
+def _limit_for(name: str) -> Limit:
+    return Limit.parse(settings.RATE_LIMITS.get(name, settings.RATE_LIMITS["default"]))
+
+
+def check_rate_limit(
+        name: str,
+        principal: str,
+        response: Optional[Response] = None,
+        limit: Optional[Limit] = None,
+        consume: bool = True
+):
+    """Consume one token of the `name` limit for `principal`, raising 429 when it is spent.
+
+    With consume=False the bucket is only checked. RateLimit-* headers are written
+    to `response` when one is given; a 429 always carries them.
+    """
+    limit = limit or _limit_for(name)
+    key = f"rate_limit:{name}:{principal}"
+    try:
+        if consume:
+            allowed, remaining, retry_after = rate_limiter.hit(key, limit)
+        else:
+            allowed, remaining, retry_after = rate_limiter.peek(key, limit)
+    except Exception as e:
+        # Fail open: losing Redis should not take the API down with it
+        print(f"Rate limiter error: {e}")
+        return
+
+    headers = {
+        "RateLimit-Limit": str(limit.capacity),
+        "RateLimit-Remaining": str(int(remaining)),
+        "RateLimit-Reset": str(int((limit.capacity - remaining) / limit.rate + 0.999))
+    }
+    if not allowed:
+        headers["Retry-After"] = str(max(1, int(retry_after + 0.999)))
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded",
+            headers=headers
+        )
+    if response is not None:
+        response.headers.update(headers)
+
+
+def charge_rate_limit(name: str, principal: str):
+    """Consume one token of the `name` limit without enforcing it, e.g. for a failed login"""
+    try:
+        rate_limiter.hit(f"rate_limit:{name}:{principal}", _limit_for(name))
+    except Exception as e:
+        print(f"Rate limiter error: {e}")
+
+
+def rate_limit(name: str):
+    """Dependency enforcing the RATE_LIMITS entry for `name` per principal"""
+    limit = _limit_for(name)
+
+    def dependency(request: Request, response: Response):
+        check_rate_limit(name, _principal(request), response, limit)
+
+    return dependency
+
+
+def should_shed_load() -> bool:
+    """Shed a share of requests that grows with how far recent pool waits exceed the threshold"""
+    threshold = settings.LOAD_SHED_POOL_WAIT_MS
+    wait = pool_wait_tracker.recent_average_ms()
+    if wait is None or wait <= threshold:
+        return False
+    return random.random() < min(1.0, (wait - threshold) / threshold)
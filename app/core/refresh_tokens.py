@@ -0,0 +1,95 @@
+"""Refresh-token families in Redis.
+
+Each login starts a family holding the id (jti) of its one valid refresh token.
+Refreshing rotates that id; presenting any older id means the token was stolen
+or replayed, so the whole family is revoked. Access tokens carry the family id,
+so revoking a family cuts off its access tokens on every worker at once.
+"""
+import uuid
+
+from app.core.config import settings
+from app.core.redis_client import get_redis_client
+
+FAMILY_KEY = "refresh_family:{family_id}"
+USER_FAMILIES_KEY = "refresh_families:{subject}"
+
+# Returns 1 when rotated, 0 when the family is unknown/revoked, -1 on reuse (family revoked).
+# KEYS[2] is the user's set of families; its TTL is extended together with the family's
+# so logout-all still finds families kept alive by refreshing alone.
+ROTATE_SCRIPT = """
+local current = redis.call('HGET', KEYS[1], 'current')
+if not current then
+    return 0
+end
+if current ~= ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    redis.call('SREM', KEYS[2], ARGV[4])
+    return -1
+end
+redis.call('HSET', KEYS[1], 'current', ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+redis.call('SADD', KEYS[2], ARGV[4])
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+return 1
+"""
+
+
+class RefreshTokenError(Exception):
+    def __init__(self, detail: str):
+        super().__init__(detail)
+        self.detail = detail
+
+
+def _ttl_seconds() -> int:
+    return settings.REFRESH_TOKEN_EXPIRE_MINUTES * 60
+
+
+def start_family(subject: str):
+    """Open a new family for a fresh login; returns (family_id, jti)"""
+    family_id = uuid.uuid4().hex
+    jti = uuid.uuid4().hex
+    pipe = get_redis_client().pipeline()
+    pipe.hset(FAMILY_KEY.format(family_id=family_id), mapping={"sub": subject, "current": jti})
+    pipe.expire(FAMILY_KEY.format(family_id=family_id), _ttl_seconds())
+    pipe.sadd(USER_FAMILIES_KEY.format(subject=subject), family_id)
+    pipe.expire(USER_FAMILIES_KEY.format(subject=subject), _ttl_seconds())
+    pipe.execute()
+    return family_id, jti
+
+
+def rotate(subject: str, family_id: str, jti: str) -> str:
+    """Swap the family's valid jti for a new one, revoking the family on reuse"""
+    new_jti = uuid.uuid4().hex
+    result = get_redis_client().eval(
+        ROTATE_SCRIPT, 2,
+        FAMILY_KEY.format(family_id=family_id), USER_FAMILIES_KEY.format(subject=subject),
+        jti, new_jti, _ttl_seconds(), family_id
+    )
+    if result == 0:
+        raise RefreshTokenError("Refresh token revoked")
+    if result == -1:
+        raise RefreshTokenError("Refresh token reuse detected; session revoked")
+    return new_jti
+
+
+def is_active(family_id: str) -> bool:
+    return bool(get_redis_client().exists(FAMILY_KEY.format(family_id=family_id)))
+
+
+def revoke_family(subject: str, family_id: str):
+    pipe = get_redis_client().pipeline()
+    pipe.delete(FAMILY_KEY.format(family_id=family_id))
+    pipe.srem(USER_FAMILIES_KEY.format(subject=subject), family_id)
+    pipe.execute()
+
+
+def revoke_all(subject: str):
+    """Revoke every session of a user"""
+    client = get_redis_client()
+    families_key = USER_FAMILIES_KEY.format(subject=subject)
+    family_ids = client.smembers(families_key)
+    pipe = client.pipeline()
+    for family_id in family_ids:
+        pipe.delete(FAMILY_KEY.format(family_id=family_id))
+    pipe.delete(families_key)
+    pipe.execute()
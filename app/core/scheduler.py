@@ -0,0 +1,206 @@
+"""Due-date scheduling backed by Redis sorted sets scored by timestamp.
+
+    python -m app.core.scheduler worker    # emit overdue/reminder events as tasks come due
+    python -m app.core.scheduler rebuild   # reconstruct the sorted sets from PostgreSQL
+"""
+import argparse
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from app.core.config import settings
+from app.core.redis_client import get_redis_client
+from app.database import SessionLocal
+from app.models import Task, TaskStatus
+
+# Every open task with a due date, per project; serves GET /tasks/overdue
+PROJECT_DUE_KEY = "task_due:project:{project_id}"
+# Work queues for the worker; entries are removed once their event is emitted
+OVERDUE_QUEUE_KEY = "task_due:overdue_queue"
+REMINDER_QUEUE_KEY = "task_due:reminder_queue"
+EVENTS_STREAM = "task_events"
+
+# Atomically take up to ARGV[2] members scored at or before ARGV[1], so
+# several workers can drain the same queue without emitting duplicates.
+POP_DUE_SCRIPT = """
+local members = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'WITHSCORES', 'LIMIT', 0, ARGV[2])
+for i = 1, #members, 2 do
+    redis.call('ZREM', KEYS[1], members[i])
+end
+return members
+"""
+
+
+# Index a task and queue its events. The overdue event is queued when the due date
+# is in the future, or when it is already past but differs from the indexed one
+# (a new task, a reopened task, or a due date moved into the past); an update that
+# leaves a past due date unchanged must not announce the task again.
+SCHEDULE_SCRIPT = """
+local previous = redis.call('ZSCORE', KEYS[1], ARGV[1])
+local due = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+redis.call('ZADD', KEYS[1], ARGV[2], ARGV[1])
+if due > now or not previous or tonumber(previous) ~= due then
+    redis.call('ZADD', KEYS[2], ARGV[2], ARGV[1])
+end
+if tonumber(ARGV[4]) > now then
+    redis.call('ZADD', KEYS[3], ARGV[4], ARGV[1])
+else
+    redis.call('ZREM', KEYS[3], ARGV[1])
+end
+return 1
+"""
+
+
+def _timestamp(value: datetime) -> float:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def schedule_task(task_id: int, project_id: int, due_date: datetime):
+    """Index a task's due date and queue its reminder and overdue events"""
+    due = _timestamp(due_date)
+    remind_at = due - settings.DUE_REMINDER_LEAD_MINUTES * 60
+    get_redis_client().eval(
+        SCHEDULE_SCRIPT, 3,
+        PROJECT_DUE_KEY.format(project_id=project_id), OVERDUE_QUEUE_KEY, REMINDER_QUEUE_KEY,
+        task_id, due, time.time(), remind_at
+    )
+
+
+def unschedule_task(task_id: int, project_id: int):
+    pipe = get_redis_client().pipeline()
+    pipe.zrem(PROJECT_DUE_KEY.format(project_id=project_id), task_id)
+    pipe.zrem(OVERDUE_QUEUE_KEY, task_id)
+    pipe.zrem(REMINDER_QUEUE_KEY, task_id)
+    pipe.execute()
+
+
+def sync_task_schedule(task):
+    """Keep the index in step with a task after create/update; done or undated tasks are dropped"""
+    try:
+        if task.due_date is not None and task.status != TaskStatus.DONE:
+            schedule_task(task.id, task.project_id, task.due_date)
+        else:
+            unschedule_task(task.id, task.project_id)
+    except Exception as e:
+        # Log error but don't fail the request; `rebuild` repairs drift
+        print(f"Redis error: {e}")
+
+
+def overdue_task_ids(project_ids: List[int], limit: int, now: Optional[float] = None) -> List[int]:
+    """Ids of open tasks past due in the given projects, most overdue first"""
+    now = time.time() if now is None else now
+    pipe = get_redis_client().pipeline()
+    for project_id in project_ids:
+        pipe.zrangebyscore(PROJECT_DUE_KEY.format(project_id=project_id), "-inf", now,
+                           start=0, num=limit, withscores=True)
+    entries = [entry for result in pipe.execute() for entry in result]
+    entries.sort(key=lambda entry: entry[1])
+    return [int(member) for member, _ in entries[:limit]]
+
+
+def pop_due(queue_key: str, batch_size: int, now: Optional[float] = None):
+    """Remove and return up to batch_size (task_id, timestamp) pairs that are due"""
+    now = time.time() if now is None else now
+    client = get_redis_client()
+    members = client.eval(POP_DUE_SCRIPT, 1, queue_key, now, batch_size)
+    return [(int(members[i]), float(members[i + 1])) for i in range(0, len(members), 2)]
+
+
+def run_once(batch_size: int) -> int:
+    """Emit events for everything currently due; returns how many were emitted"""
+    client = get_redis_client()
+    emitted = 0
+    for queue_key, event in ((REMINDER_QUEUE_KEY, "task.reminder"), (OVERDUE_QUEUE_KEY, "task.overdue")):
+        while True:
+            batch = pop_due(queue_key, batch_size)
+            if not batch:
+                break
+            pipe = client.pipeline()
+            for task_id, score in batch:
+                pipe.xadd(
+                    EVENTS_STREAM,
+                    {"event": event, "task_id": task_id, "at": score},
+                    maxlen=settings.TASK_EVENTS_MAXLEN,
+                    approximate=True
+                )
+            pipe.execute()
+            emitted += len(batch)
+            if len(batch) < batch_size:
+                break
+    return emitted
+
+
+def run_worker():
+    print("Starting due-date scheduler...")
+    while True:
+        try:
+            emitted = run_once(settings.SCHEDULER_BATCH_SIZE)
+            if emitted:
+                print(f"Emitted {emitted} due-date events")
+        except Exception as e:
+            print(f"Scheduler error: {e}")
+        time.sleep(settings.SCHEDULER_POLL_SECONDS)
+
+
+def rebuild():
+    """Rebuild the index from PostgreSQL, swapping each key in atomically.
+
+    Only future due dates are re-queued for events, so a rebuild does not
+    re-announce tasks that were already reported overdue.
+    """
+    client = get_redis_client()
+    suffix = f":rebuild:{int(time.time())}"
+    now = time.time()
+    rebuilt_keys = set()
+
+    db = SessionLocal()
+    try:
+        rows = db.query(Task.id, Task.project_id, Task.due_date).filter(
+            Task.due_date.isnot(None),
+            Task.status != TaskStatus.DONE
+        ).yield_per(1000)
+
+        pipe = client.pipeline(transaction=False)
+        count = 0
+        for task_id, project_id, due_date in rows:
+            due = _timestamp(due_date)
+            project_key = PROJECT_DUE_KEY.format(project_id=project_id)
+            rebuilt_keys.add(project_key)
+            pipe.zadd(project_key + suffix, {task_id: due})
+            if due > now:
+                pipe.zadd(OVERDUE_QUEUE_KEY + suffix, {task_id: due})
+                remind_at = due - settings.DUE_REMINDER_LEAD_MINUTES * 60
+                if remind_at > now:
+                    pipe.zadd(REMINDER_QUEUE_KEY + suffix, {task_id: remind_at})
+            count += 1
+            if count % 1000 == 0:
+                pipe.execute()
+        pipe.execute()
+    finally:
+        db.close()
+
+    pipe = client.pipeline()
+    for key in rebuilt_keys | {OVERDUE_QUEUE_KEY, REMINDER_QUEUE_KEY}:
+        if client.exists(key + suffix):
+            pipe.rename(key + suffix, key)
+        else:
+            pipe.delete(key)
+    for key in client.scan_iter(match=PROJECT_DUE_KEY.format(project_id="*")):
+        if ":rebuild:" not in key and key not in rebuilt_keys:
+            pipe.delete(key)
+    pipe.execute()
+    print(f"Rebuilt due-date index with {count} tasks")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Task due-date scheduler")
+    parser.add_argument("command", choices=["worker", "rebuild"])
+    args = parser.parse_args()
+
+    if args.command == "worker":
+        run_worker()
+    else:
+        rebuild()
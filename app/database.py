@@ -1,20 +1,180 @@
+import itertools
+import threading
+import time
+from typing import Optional
+
+from fastapi import Request
 from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError, ProgrammingError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from app.core.config import settings
 
+# Cookie/header carrying the timestamp of the client's last successful write
+LAST_WRITE_COOKIE = "last_write_at"
+LAST_WRITE_HEADER = "X-Last-Write-At"
+
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
-    pool_recycle=300
+    pool_recycle=300,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW
 )
 
+replica_engines = [
+    create_engine(url, pool_pre_ping=True, pool_recycle=300)
+    for url in settings.DATABASE_REPLICA_URLS
+]
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
-def get_db():
+
+class ReplicaRouter:
+    """Round-robin over read replicas, skipping any that recently failed."""
+
+    def __init__(self, engines, retry_seconds: int):
+        self.engines = engines
+        self.retry_seconds = retry_seconds
+        self._cycle = itertools.cycle(range(len(engines)))
+        self._down_until = {}
+        self._lock = threading.Lock()
+
+    def candidates(self):
+        """Return healthy replicas in round-robin order, starting from the next one."""
+        if not self.engines:
+            return []
+        with self._lock:
+            start = next(self._cycle)
+        now = time.monotonic()
+        ordered = self.engines[start:] + self.engines[:start]
+        return [e for e in ordered if self._down_until.get(e, 0) <= now]
+
+    def mark_down(self, replica):
+        with self._lock:
+            self._down_until[replica] = time.monotonic() + self.retry_seconds
+
+    def mark_up(self, replica):
+        with self._lock:
+            self._down_until.pop(replica, None)
+
+
+class PoolWaitTracker:
+    """Moving average of how long requests wait to check out a primary connection."""
+
+    def __init__(self, window_seconds: float, smoothing: float = 0.2):
+        self.window_seconds = window_seconds
+        self.smoothing = smoothing
+        self._average_ms = None
+        self._last_sample_at = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, wait_ms: float):
+        with self._lock:
+            if self._average_ms is None:
+                self._average_ms = wait_ms
+            else:
+                self._average_ms += self.smoothing * (wait_ms - self._average_ms)
+            self._last_sample_at = time.monotonic()
+
+    def recent_average_ms(self) -> Optional[float]:
+        """The average, or None once no samples have arrived for a whole window"""
+        if time.monotonic() - self._last_sample_at > self.window_seconds:
+            return None
+        return self._average_ms
+
+
+replica_router = ReplicaRouter(replica_engines, settings.REPLICA_RETRY_SECONDS)
+pool_wait_tracker = PoolWaitTracker(settings.LOAD_SHED_WINDOW_SECONDS)
+
+
+def _last_write_at(request: Request) -> Optional[float]:
+    value = request.headers.get(LAST_WRITE_HEADER) or request.cookies.get(LAST_WRITE_COOKIE)
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def _is_pinned_to_primary(request: Request) -> bool:
+    """Clients that wrote in the last few seconds read from the primary (read-your-writes)."""
+    last_write = _last_write_at(request)
+    return last_write is not None and time.time() - last_write < settings.REPLICA_PIN_SECONDS
+
+
+class ReadSession(Session):
+    """Session on a replica that moves to the primary if the replica fails mid-request.
+
+    Covers errors at query time as well as at connect time, e.g. a replica that
+    lags behind and is missing a table. The replica is only marked down once the
+    primary has run the same query, so a broken query does not knock replicas out.
+    """
+
+    replica = None
+
+    def execute(self, *args, **kwargs):
+        try:
+            return super().execute(*args, **kwargs)
+        except (OperationalError, ProgrammingError) as e:
+            if self.replica is None:
+                raise
+            replica = self.replica
+            print(f"Read replica query failed, retrying on primary: {e}")
+            self.rollback()
+            self.bind = engine
+            self.replica = None
+            result = super().execute(*args, **kwargs)
+            replica_router.mark_down(replica)
+            return result
+
+
+def _open_read_session():
+    for replica in replica_router.candidates():
+        db = ReadSession(bind=replica, autoflush=False)
+        db.replica = replica
+        try:
+            # Check out a connection now so a dead replica fails over before the handler runs
+            db.connection()
+        except OperationalError as e:
+            db.close()
+            replica_router.mark_down(replica)
+            print(f"Read replica unavailable, failing over: {e}")
+            continue
+        replica_router.mark_up(replica)
+        return db
+
+    # No replicas configured or all unhealthy: fall back to the primary
+    return _open_primary_session()
+
+
+def _open_primary_session():
+    """Primary session with its connection checked out up front, timing the wait for load shedding."""
     db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        db.connection()
+    except Exception:
+        db.close()
+        raise
+    finally:
+        # Sampled even when the checkout times out; that is the most saturated case
+        pool_wait_tracker.record((time.perf_counter() - started) * 1000)
+    return db
+
+
+def get_db():
+    db = _open_primary_session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_read_db(request: Request):
+    """Session for read-only handlers, routed to a replica unless pinned to the primary."""
+    db = _open_primary_session() if _is_pinned_to_primary(request) else _open_read_session()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
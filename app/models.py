@@ -1,6 +1,8 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Enum, Table
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Boolean, DateTime, ForeignKey, Enum, Table, event, select
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from sqlalchemy.sql.functions import FunctionElement
 from app.database import Base
 import enum
 
@@ -12,6 +14,27 @@ user_project_association = Table(
     Column("project_id", Integer, ForeignKey("projects.id"), primary_key=True)
 )
 
+class next_change_seq(FunctionElement):
+    """Database clock in microseconds; stamps each write for delta sync (GET /api/v1/sync)"""
+    type = BigInteger()
+    inherit_cache = True
+
+
+@compiles(next_change_seq)
+def _next_change_seq_default(element, compiler, **kw):
+    return "CAST((julianday('now') - 2440587.5) * 86400000000 AS INTEGER)"
+
+
+@compiles(next_change_seq, "postgresql")
+def _next_change_seq_postgresql(element, compiler, **kw):
+    # clock_timestamp() advances within a transaction, unlike now()
+    return "CAST(EXTRACT(EPOCH FROM clock_timestamp()) * 1000000 AS BIGINT)"
+
+
+def _change_seq_column():
+    return Column(BigInteger, default=next_change_seq(), onupdate=next_change_seq(), index=True)
+
+
 class UserRole(str, enum.Enum):
     ADMIN = "admin"
     TEAM_LEAD = "team_lead"
@@ -43,7 +66,7 @@ class User(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
-    created_projects = relationship("Project", back_populates="created_at")
+    created_projects = relationship("Project", back_populates="created_by")
     assigned_tasks = relationship("Task", back_populates="assignee")
     projects = relationship("Project", secondary=user_project_association, back_populates="members")
     comments = relationship("Comment", back_populates="author")
@@ -58,6 +81,7 @@ class Project(Base):
     created_by_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    change_seq = _change_seq_column()
 
     # Relationships
     created_by = relationship("User", back_populates="created_projects")
@@ -84,10 +108,14 @@ class Task(Base):
     due_date = Column(DateTime(timezone=True))
     completed_at = Column(DateTime(timezone=True))
 
+    # Optimistic concurrency: bumped by the conditional UPDATE in the tasks router, exposed as the ETag
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    change_seq = _change_seq_column()
+
     # Relationships
     project = relationship("Project", back_populates="tasks")
     assignee = relationship("User", back_populates="assigned_tasks")
-    comments = relationship("Comment", back_populates="task", remote_side=[id])
+    comments = relationship("Comment", back_populates="task", cascade="all, delete-orphan")
     attachments = relationship("Attachment", back_populates="task", cascade="all, delete-orphan")
 
 class Comment(Base):
@@ -99,10 +127,11 @@ class Comment(Base):
     author_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    change_seq = _change_seq_column()
 
     # Relationships
     task = relationship("Task", back_populates="comments")
-    author = relationship("user", back_populates="comments")
+    author = relationship("User", back_populates="comments")
 
 class Attachment(Base):
     __tablename__ = "attachments"
@@ -118,4 +147,32 @@ class Attachment(Base):
 
     # Relationships
     task = relationship("Task", back_populates="attachments")
-    uploaded_by = relationship("User")
\ No newline at end of file
+    uploaded_by = relationship("User")
+
+class SyncTombstone(Base):
+    """Records deleted rows so delta sync can tell clients to drop them"""
+    __tablename__ = "sync_tombstones"
+
+    id = Column(Integer, primary_key=True, index=True)
+    entity_type = Column(String(20), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    project_id = Column(Integer, nullable=False)
+    change_seq = Column(BigInteger, default=next_change_seq(), nullable=False, index=True)
+
+
+def _record_tombstone(entity_type: str, project_id):
+    def after_delete(mapper, connection, target):
+        connection.execute(SyncTombstone.__table__.insert().values(
+            entity_type=entity_type,
+            entity_id=target.id,
+            project_id=project_id(target)
+        ))
+    return after_delete
+
+
+event.listen(Project, "after_delete", _record_tombstone("project", lambda project: project.id))
+event.listen(Task, "after_delete", _record_tombstone("task", lambda task: task.project_id))
+event.listen(Comment, "after_delete", _record_tombstone(
+    "comment",
+    lambda comment: select(Task.project_id).where(Task.id == comment.task_id).scalar_subquery()
+))
@@ -9,9 +9,11 @@ import jwt
 from datetime import datetime, timedelta
 from passlib.hash import bcrypt
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models import User
 from app.core.config import settings
+from app.core.rate_limit import rate_limit, check_rate_limit, charge_rate_limit
+from app.core import refresh_tokens
 
 router = APIRouter()
 security = HTTPBearer()
@@ -30,6 +32,11 @@ class Token(BaseModel):
     access_token: str
     token_type: str
     expires_in: int
+    refresh_token: Optional[str] = None
+    refresh_expires_in: Optional[int] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -42,23 +49,69 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+def create_refresh_token(subject: str, family_id: str, jti: str):
+    expire = datetime.now() + timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES)
+    to_encode = {"sub": subject, "fam": family_id, "jti": jti, "type": "refresh", "exp": expire}
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+def _issue_tokens(subject: str, family_id: Optional[str] = None, jti: Optional[str] = None):
+    """Access token plus, when a refresh family is available, a refresh token for it"""
+    if family_id is None:
+        try:
+            family_id, jti = refresh_tokens.start_family(subject)
+        except Exception as e:
+            # Log error but still let the user in, just without a refresh token
+            print(f"Redis error: {e}")
+
+    token = {
+        "access_token": create_access_token(data={"sub": subject, "fam": family_id, "type": "access"}),
+        "token_type": "bearer",
+        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    }
+    if family_id is not None:
+        token["refresh_token"] = create_refresh_token(subject, family_id, jti)
+        token["refresh_expires_in"] = settings.REFRESH_TOKEN_EXPIRE_MINUTES * 60
+    return token
+
+def get_token_payload(credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
         payload = jwt.decode(credentials.credentials, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise HTTPException(status_code=401, detail="Invalid Token")
-        return email
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid Token")
 
-def get_current_user(email: str = Depends(verify_token), db: Session = Depends(get_db)):
+    if payload.get("sub") is None or payload.get("type") == "refresh":
+        raise HTTPException(status_code=401, detail="Invalid Token")
+
+    # O(1) revocation check: the token's refresh family must still exist
+    family_id = payload.get("fam")
+    if family_id:
+        try:
+            revoked = not refresh_tokens.is_active(family_id)
+        except Exception as e:
+            # Fail open: access tokens are short-lived and Redis being down should not lock everyone out
+            print(f"Redis error: {e}")
+            revoked = False
+        if revoked:
+            raise HTTPException(status_code=401, detail="Token revoked")
+    return payload
+
+def verify_token(payload: dict = Depends(get_token_payload)):
+    return payload["sub"]
+
+def _load_user(email: str, db: Session) -> User:
     user = db.query(User).filter(User.email == email).first()
     if user is None:
-        raise HTTPException(status_code=4.0, detail="User Not Found")
-    return User
+        raise HTTPException(status_code=404, detail="User Not Found")
+    return user
 
-@router.post("/register", response_model=Token)
+def get_current_user(email: str = Depends(verify_token), db: Session = Depends(get_db)):
+    return _load_user(email, db)
+
+def get_current_read_user(email: str = Depends(verify_token), db: Session = Depends(get_read_db)):
+    """get_current_user for read-only routes; shares the route's replica session"""
+    return _load_user(email, db)
+
+@router.post("/register", response_model=Token, dependencies=[Depends(rate_limit("register"))])
 def register(user: UserCreate, db: Session = Depends(get_db)):
     if db.query(User).filter(User.email == user.email).first():
         raise HTTPException(status_code=400, detail="Email already registered.")
@@ -80,31 +133,64 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
     db.refresh(db_user)
 
     # Create Token
-    access_token = create_access_token(data={"sub": user.email})
-
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
-    }
+    return _issue_tokens(user.email)
 
-@router.post("/login", response_model=Token)
+@router.post("/login", response_model=Token, dependencies=[Depends(rate_limit("login"))])
 def login(user_login: UserLogin, db: Session = Depends(get_db)):
+    # Per-account limit on failed attempts, on top of the per-IP one, so distributed guessing
+    # is capped too. Only failures are charged, so successful logins never lock a user out;
+    # the response reports the per-IP bucket.
+    account = f"email:{user_login.email.lower()}"
+    check_rate_limit("login_account", account, consume=False)
+
     user = db.query(User).filter(User.email == user_login.email).first()
 
     if not user or not bcrypt.verify(user_login.password, user.hashed_password):
+        charge_rate_limit("login_account", account)
         raise HTTPException(status_code=401, detail="Invalid Credentials")
 
     if not user.is_active:
         raise HTTPException(status_code=401, detail="User account is disabled")
 
-    access_token = create_access_token(data={"sub": user.email})
+    return _issue_tokens(user.email)
 
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
-    }
+@router.post("/refresh", response_model=Token, dependencies=[Depends(rate_limit("refresh"))])
+def refresh(refresh_request: RefreshRequest, db: Session = Depends(get_db)):
+    """Rotate a refresh token for a new token pair, without a password check"""
+    try:
+        payload = jwt.decode(refresh_request.refresh_token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except jwt.PyJWTError:
+        raise HTTPException(status_code=401, detail="Invalid Token")
+
+    if payload.get("type") != "refresh" or not payload.get("fam") or not payload.get("jti"):
+        raise HTTPException(status_code=401, detail="Invalid Token")
+
+    try:
+        new_jti = refresh_tokens.rotate(payload["sub"], payload["fam"], payload["jti"])
+    except refresh_tokens.RefreshTokenError as e:
+        raise HTTPException(status_code=401, detail=e.detail)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Token store unavailable: {e}")
+
+    user = db.query(User).filter(User.email == payload["sub"]).first()
+    if not user or not user.is_active:
+        refresh_tokens.revoke_family(payload["sub"], payload["fam"])
+        raise HTTPException(status_code=401, detail="User account is disabled")
+
+    return _issue_tokens(user.email, payload["fam"], new_jti)
+
+@router.post("/logout")
+def logout(all_sessions: bool = False, payload: dict = Depends(get_token_payload)):
+    """Revoke this session's refresh family, or every session of the user"""
+    try:
+        if all_sessions:
+            refresh_tokens.revoke_all(payload["sub"])
+        elif payload.get("fam"):
+            refresh_tokens.revoke_family(payload["sub"], payload["fam"])
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Token store unavailable: {e}")
+
+    return {"message": "Logged out successfully"}
 
 @router.get("/me")
 def get_current_user_info(current_user: User = Depends(get_current_user)):
@@ -3,9 +3,9 @@ from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models import Project, User
-from app.routers.auth import get_current_user
+from app.routers.auth import get_current_user, get_current_read_user
 
 router = APIRouter()
 
@@ -59,8 +59,8 @@ def create_project(
 
 @router.get("/", response_model=List[ProjectResponse])
 def get_projects(
-        current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        current_user: User = Depends(get_current_read_user),
+        db: Session = Depends(get_read_db)
 ):
     # Get projects where user is member or creator
     projects = db.query(Project).filter(
@@ -0,0 +1,155 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import exists, select
+from sqlalchemy.orm import Session
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+from app.core.config import settings
+from app.database import get_db
+from app.models import (
+    Comment, Project, SyncTombstone, Task, TaskPriority, TaskStatus, User,
+    next_change_seq, user_project_association
+)
+from app.routers.auth import get_current_user
+
+router = APIRouter()
+
+
+class SyncProject(BaseModel):
+    id: int
+    name: str
+    description: Optional[str]
+    is_active: bool
+    created_by_id: int
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
+
+
+class SyncTask(BaseModel):
+    id: int
+    title: str
+    description: Optional[str]
+    status: TaskStatus
+    priority: TaskPriority
+    project_id: int
+    assignee_id: Optional[int]
+    parent_task_id: Optional[int]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    due_date: Optional[datetime]
+    completed_at: Optional[datetime]
+    version: int
+
+    class Config:
+        from_attributes = True
+
+
+class SyncComment(BaseModel):
+    id: int
+    content: str
+    task_id: int
+    author_id: int
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
+
+
+class SyncDeletion(BaseModel):
+    type: str
+    id: int
+
+
+class SyncResponse(BaseModel):
+    projects: List[SyncProject] = []
+    tasks: List[SyncTask] = []
+    comments: List[SyncComment] = []
+    deleted: List[SyncDeletion] = []
+    next_token: str
+    has_more: bool
+
+
+@router.get("", response_model=SyncResponse)
+def sync(
+        since: Optional[str] = Query(None, description="next_token from the previous sync; omit for a full sync"),
+        current_user: User = Depends(get_current_user),
+        db: Session = Depends(get_db)
+):
+    """Everything created, updated or deleted since the token, in change_seq order.
+
+    Each entity type is one range scan on its change_seq index. Rows newer than
+    SYNC_SETTLE_SECONDS are held back so a transaction that stamped an earlier
+    change_seq but commits late is not skipped.
+
+    Served from the primary, not a replica: a replica only has commits up to its
+    replay point, which trails its clock by the replication lag, so a horizon taken
+    from its clock stops protecting anything once the lag reaches the settle window.
+    """
+    try:
+        since_seq = int(since) if since else 0
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+
+    batch = settings.SYNC_BATCH_SIZE
+    horizon = next_change_seq() - int(settings.SYNC_SETTLE_SECONDS * 1_000_000)
+    accessible_projects = select(Project.id).where(
+        (Project.created_by_id == current_user.id) |
+        Project.id.in_(
+            select(user_project_association.c.project_id)
+            .where(user_project_association.c.user_id == current_user.id)
+        )
+    )
+
+    sources = {
+        "projects": (Project, Project.id.in_(accessible_projects)),
+        "tasks": (Task, Task.project_id.in_(accessible_projects)),
+        "comments": (Comment, Comment.task_id.in_(
+            select(Task.id).where(Task.project_id.in_(accessible_projects))
+        )),
+        # Once a project is deleted its membership rows are gone too, so tombstones
+        # under a project that no longer exists skip the access check; they only
+        # carry the type and id of what was deleted.
+        "deleted": (SyncTombstone, SyncTombstone.project_id.in_(accessible_projects) | ~exists().where(
+            Project.id == SyncTombstone.project_id
+        ))
+    }
+
+    def changed(model, condition):
+        return db.query(model).filter(
+            model.change_seq > since_seq,
+            model.change_seq <= horizon,
+            condition
+        ).order_by(model.change_seq).limit(batch).all()
+
+    pages = {name: changed(model, condition) for name, (model, condition) in sources.items()}
+
+    # A full page may have more rows at or after its last change_seq; only return
+    # what is strictly before the earliest such cut so the next token skips nothing.
+    full_pages = [rows[-1].change_seq for rows in pages.values() if len(rows) == batch]
+    has_more = bool(full_pages)
+    if has_more:
+        cut = min(full_pages)
+        pages = {name: [row for row in rows if row.change_seq < cut] for name, rows in pages.items()}
+        if not any(pages.values()):
+            # Pathological: a whole batch shares one change_seq. Return every row at it,
+            # past the batch size, since the next token moves beyond it.
+            pages = {
+                name: db.query(model).filter(model.change_seq == cut, condition).all()
+                for name, (model, condition) in sources.items()
+            }
+
+    next_seq = max([since_seq] + [rows[-1].change_seq for rows in pages.values() if rows])
+
+    return SyncResponse(
+        projects=pages["projects"],
+        tasks=pages["tasks"],
+        comments=pages["comments"],
+        deleted=[SyncDeletion(type=row.entity_type, id=row.entity_id) for row in pages["deleted"]],
+        next_token=str(next_seq),
+        has_more=has_more
+    )
@@ -1,16 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Response
+from sqlalchemy import case, func, select, update
+from sqlalchemy.orm import Session, joinedload, aliased
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
+import hashlib
 
-from app.database import get_db
-from app.models import Task, User, Project, TaskStatus, TaskPriority
-from app.routers.auth import get_current_user
+from app.database import get_db, get_read_db
+from app.models import Task, User, Project, TaskStatus, TaskPriority, user_project_association
+from app.routers.auth import get_current_user, get_current_read_user
 from app.core.redis_client import get_redis_client
+from app.core.rate_limit import rate_limit
+from app.core import scheduler
 
 router = APIRouter()
 
+# Task columns returned directly by the conditional UPDATE
+_TASK_COLUMNS = (
+    "id", "title", "description", "status", "priority", "project_id", "assignee_id",
+    "parent_task_id", "created_at", "updated_at", "due_date", "completed_at", "version"
+)
+
 
 class TaskCreate(BaseModel):
     title: str
@@ -29,6 +39,12 @@ class TaskUpdate(BaseModel):
     priority: Optional[TaskPriority] = None
     assignee_id: Optional[int] = None
     due_date: Optional[datetime] = None
+    version: Optional[int] = None
+
+
+class TaskStatusUpdate(BaseModel):
+    status: TaskStatus
+    version: Optional[int] = None
 
 
 class TaskResponse(BaseModel):
@@ -44,6 +60,7 @@ class TaskResponse(BaseModel):
     updated_at: Optional[datetime]
     due_date: Optional[datetime]
     completed_at: Optional[datetime]
+    version: int
 
     # Related data
     project_name: Optional[str] = None
@@ -57,6 +74,7 @@ class TaskResponse(BaseModel):
 @router.post("/", response_model=TaskResponse)
 def create_task(
         task: TaskCreate,
+        response: Response,
         current_user: User = Depends(get_current_user),
         db: Session = Depends(get_db)
 ):
@@ -93,19 +111,23 @@ def create_task(
         # Log error but don't fail the request
         print(f"Redis error: {e}")
 
+    scheduler.sync_task_schedule(db_task)
+
+    response.headers["ETag"] = _etag(db_task.version)
     return _build_task_response(db_task, db)
 
 
-@router.get("/", response_model=List[TaskResponse])
+@router.get("/", response_model=List[TaskResponse], dependencies=[Depends(rate_limit("list_tasks"))])
 def get_tasks(
+        response: Response,
         project_id: Optional[int] = Query(None),
         status: Optional[TaskStatus] = Query(None),
         assignee_id: Optional[int] = Query(None),
         priority: Optional[TaskPriority] = Query(None),
         skip: int = Query(0, ge=0),
         limit: int = Query(100, ge=1, le=100),
-        current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        current_user: User = Depends(get_current_read_user),
+        db: Session = Depends(get_read_db)
 ):
     # Build query
     query = db.query(Task).options(
@@ -116,7 +138,7 @@ def get_tasks(
     # Filter by project access
     if project_id:
         project = db.query(Project).filter(Project.id == project_id).first()
-        if not project or (current_user not in project.members and project.created_by != current_user):
+        if not project or not _has_project_access(project, current_user):
             raise HTTPException(status_code=403, detail="Not authorized to view tasks in this project")
         query = query.filter(Task.project_id == project_id)
     else:
@@ -138,14 +160,53 @@ def get_tasks(
     # Apply pagination
     tasks = query.offset(skip).limit(limit).all()
 
+    response.headers["ETag"] = _list_etag(tasks)
+    return [_build_task_response(task, db) for task in tasks]
+
+
+@router.get("/overdue", response_model=List[TaskResponse])
+def get_overdue_tasks(
+        response: Response,
+        limit: int = Query(100, ge=1, le=100),
+        current_user: User = Depends(get_current_read_user),
+        db: Session = Depends(get_read_db)
+):
+    """Open tasks past their due date, most overdue first, served from the Redis due-date index"""
+    project_ids = [project_id for (project_id,) in db.query(Project.id).filter(
+        (Project.members.contains(current_user)) | (Project.created_by_id == current_user.id)
+    )]
+    if not project_ids:
+        return []
+
+    try:
+        task_ids = scheduler.overdue_task_ids(project_ids, limit)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Due-date index unavailable: {e}")
+    if not task_ids:
+        return []
+
+    tasks = db.query(Task).options(
+        joinedload(Task.project),
+        joinedload(Task.assignee)
+    ).filter(
+        Task.id.in_(task_ids),
+        # The index is best-effort; re-check so drift never shows done or rescheduled tasks
+        Task.status != TaskStatus.DONE,
+        Task.due_date <= func.now()
+    ).all()
+    by_id = {task.id: task for task in tasks}
+
+    tasks = [by_id[task_id] for task_id in task_ids if task_id in by_id]
+    response.headers["ETag"] = _list_etag(tasks)
     return [_build_task_response(task, db) for task in tasks]
 
 
 @router.get("/{task_id}", response_model=TaskResponse)
 def get_task(
         task_id: int,
-        current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        response: Response,
+        current_user: User = Depends(get_current_read_user),
+        db: Session = Depends(get_read_db)
 ):
     task = db.query(Task).options(
         joinedload(Task.project),
@@ -156,10 +217,10 @@ def get_task(
         raise HTTPException(status_code=404, detail="Task not found")
 
     # Check access
-    if (current_user not in task.project.members and
-            task.project.created_by != current_user):
+    if not _has_project_access(task.project, current_user):
         raise HTTPException(status_code=403, detail="Not authorized to view this task")
 
+    response.headers["ETag"] = _etag(task.version)
     return _build_task_response(task, db)
 
 
@@ -167,36 +228,36 @@ def get_task(
 def update_task(
         task_id: int,
         task_update: TaskUpdate,
+        response: Response,
+        if_match: Optional[str] = Header(None),
         current_user: User = Depends(get_current_user),
         db: Session = Depends(get_db)
 ):
-    task = db.query(Task).filter(Task.id == task_id).first()
-
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
-
-    # Check access
-    if (current_user not in task.project.members and
-            task.project.created_by != current_user):
-        raise HTTPException(status_code=403, detail="Not authorized to update this task")
-
-    # Update fields
     update_data = task_update.model_dump(exclude_unset=True)
+    expected_version = _expected_version(if_match, update_data.pop("version", None))
 
-    # Handle status change to completed
-    if update_data.get("status") == TaskStatus.DONE and task.status != TaskStatus.DONE:
-        update_data["completed_at"] = datetime.utcnow()
-    elif update_data.get("status") != TaskStatus.DONE and task.status == TaskStatus.DONE:
-        update_data["completed_at"] = None
+    task = _conditional_update(db, task_id, current_user, update_data, expected_version)
+    if "due_date" in update_data or "status" in update_data:
+        scheduler.sync_task_schedule(task)
+    response.headers["ETag"] = _etag(task.version)
+    return task
 
-    for field, value in update_data.items():
-        setattr(task, field, value)
 
-    task.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(task)
+@router.patch("/{task_id}/status", response_model=TaskResponse)
+def update_task_status(
+        task_id: int,
+        status_update: TaskStatusUpdate,
+        response: Response,
+        if_match: Optional[str] = Header(None),
+        current_user: User = Depends(get_current_user),
+        db: Session = Depends(get_db)
+):
+    expected_version = _expected_version(if_match, status_update.version)
 
-    return _build_task_response(task, db)
+    task = _conditional_update(db, task_id, current_user, {"status": status_update.status}, expected_version)
+    scheduler.sync_task_schedule(task)
+    response.headers["ETag"] = _etag(task.version)
+    return task
 
 
 @router.delete("/{task_id}")
@@ -214,12 +275,114 @@ def delete_task(
     if (task.project.created_by != current_user and task.assignee != current_user):
         raise HTTPException(status_code=403, detail="Not authorized to delete this task")
 
+    project_id = task.project_id
     db.delete(task)
     db.commit()
 
+    try:
+        scheduler.unschedule_task(task_id, project_id)
+    except Exception as e:
+        print(f"Redis error: {e}")
+
     return {"message": "Task deleted successfully"}
 
 
+def _etag(version: int) -> str:
+    """Strong ETag for a single task; clients send it back as If-Match"""
+    return f'"{version}"'
+
+
+def _list_etag(tasks: List[Task]) -> str:
+    """Weak ETag for a page of tasks; changes when any task on it is updated"""
+    digest = hashlib.sha1(",".join(f"{task.id}:{task.version}" for task in tasks).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+def _expected_version(if_match: Optional[str], body_version: Optional[int]) -> Optional[int]:
+    """Version the client last saw, from an If-Match ETag or the request body"""
+    if if_match is None or if_match.strip() == "*":
+        return body_version
+    try:
+        return int(if_match.strip().removeprefix("W/").strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="If-Match must be a task version ETag")
+
+
+def _conditional_update(
+        db: Session,
+        task_id: int,
+        user: User,
+        update_data: dict,
+        expected_version: Optional[int]
+) -> TaskResponse:
+    """Apply an update in one UPDATE ... WHERE id, version and access match ... RETURNING"""
+    now = datetime.utcnow()
+    values = dict(update_data, updated_at=now, version=Task.version + 1)
+
+    # Handle status change to completed
+    if "status" in update_data:
+        if update_data["status"] == TaskStatus.DONE:
+            values["completed_at"] = case((Task.status == TaskStatus.DONE, Task.completed_at), else_=now)
+        else:
+            values["completed_at"] = None
+
+    accessible_projects = select(Project.id).where(
+        (Project.created_by_id == user.id) |
+        Project.id.in_(
+            select(user_project_association.c.project_id)
+            .where(user_project_association.c.user_id == user.id)
+        )
+    )
+    conditions = [Task.id == task_id, Task.project_id.in_(accessible_projects)]
+    if expected_version is not None:
+        conditions.append(Task.version == expected_version)
+
+    subtask = aliased(Task)
+    stmt = (
+        update(Task)
+        .where(*conditions)
+        .values(**values)
+        .returning(
+            *[getattr(Task, field) for field in _TASK_COLUMNS],
+            select(Project.name).where(Project.id == Task.project_id)
+            .scalar_subquery().label("project_name"),
+            select(User.full_name).where(User.id == Task.assignee_id)
+            .scalar_subquery().label("assignee_name"),
+            select(func.count()).select_from(subtask).where(subtask.parent_task_id == Task.id)
+            .scalar_subquery().label("subtask_count")
+        )
+        .execution_options(synchronize_session=False)
+    )
+    row = db.execute(stmt).mappings().first()
+
+    if row is None:
+        db.rollback()
+        _raise_update_failure(db, task_id, user, expected_version)
+
+    db.commit()
+    return TaskResponse(**row)
+
+
+def _raise_update_failure(db: Session, task_id: int, user: User, expected_version: Optional[int]):
+    """Work out why a conditional update matched no rows; only runs on the failure path"""
+    task = db.query(Task).filter(Task.id == task_id).first()
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    if not _has_project_access(task.project, user):
+        raise HTTPException(status_code=403, detail="Not authorized to update this task")
+    raise HTTPException(
+        status_code=409,
+        detail=f"Task was modified concurrently (expected version {expected_version}, current {task.version})",
+        headers={"ETag": _etag(task.version)}
+    )
+
+
+def _has_project_access(project: Project, user: User) -> bool:
+    """Compare by id so users loaded from another session (e.g. a replica) still match"""
+    return (project.created_by_id == user.id or
+            any(member.id == user.id for member in project.members))
+
+
 def _build_task_response(task: Task, db: Session) -> TaskResponse:
     """Helper function to build task response with related data"""
     subtask_count = db.query(Task).filter(Task.parent_task_id == task.id).count()
@@ -237,6 +400,7 @@ def _build_task_response(task: Task, db: Session) -> TaskResponse:
         updated_at=task.updated_at,
         due_date=task.due_date,
         completed_at=task.completed_at,
+        version=task.version,
         project_name=task.project.name if task.project else None,
         assignee_name=task.assignee.full_name if task.assignee else None,
         subtask_count=subtask_count
@@ -1,16 +1,16 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.security import HTTPBearer
-from sqlalchemy.orm import Session
-import redis
+from fastapi.responses import JSONResponse
 import os
+import time
 from contextlib import asynccontextmanager
 
-from app.database import get_db, engine
+from app.database import engine, LAST_WRITE_COOKIE, LAST_WRITE_HEADER
 from app.models import Base
-from app.routers import auth, tasks, users, projects
+from app.routers import auth, tasks, users, projects, sync
 from app.core.config import settings
-from app.core.redis_client import get_redis_client
+from app.core.health import health_prober
+from app.core.rate_limit import should_shed_load
 
 # Create tables
 Base.metadata.create_all(bind=engine)
@@ -21,25 +21,17 @@ async def lifespan(app: FastAPI):
     # Startup
     print("Starting Task Management API...")
 
-    # Test database connection
-    try:
-        with get_db().__next__() as db:
-            db.execute("SELECT 1")
-        print("PostgreSQL connection successful")
-    except Exception as e:
-        print(f"PostgreSQL connection failed: {e}")
-
-    # Test Redis connection
-    try:
-        redis_client = get_redis_client()
-        redis_client.ping()
-        print("Redis connection successful")
-    except Exception as e:
-        print(f"Redis connection failed: {e}")
+    # Probe PostgreSQL and Redis once before serving, then keep probing in the background
+    await health_prober.run_once()
+    for name, result in health_prober.result["dependencies"].items():
+        if name != "pool":
+            print(f"{name}: {result['status']} ({result['latency_ms']}ms)")
+    health_prober.start()
 
     yield
 
     # Shutdown
+    await health_prober.stop()
     print("Shutting down Task Management API...")
 
 
@@ -59,11 +51,41 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def shed_load(request: Request, call_next):
+    """Turn away a share of traffic while DB connection checkouts are backing up"""
+    if request.url.path not in ("/health", "/livez", "/readyz") and should_shed_load():
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"detail": "Server overloaded, please retry"},
+            headers={"Retry-After": "1"}
+        )
+    return await call_next(request)
+
+
+@app.middleware("http")
+async def pin_writes_to_primary(request: Request, call_next):
+    """Stamp successful writes so the client's next reads go to the primary."""
+    response = await call_next(request)
+    if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        last_write_at = f"{time.time():.3f}"
+        response.headers[LAST_WRITE_HEADER] = last_write_at
+        response.set_cookie(
+            LAST_WRITE_COOKIE,
+            last_write_at,
+            max_age=settings.REPLICA_PIN_SECONDS,
+            httponly=True,
+            samesite="lax"
+        )
+    return response
+
 # Include routers
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
 app.include_router(users.router, prefix="/api/v1/users", tags=["Users"])
 app.include_router(projects.router, prefix="/api/v1/projects", tags=["Projects"])
 app.include_router(tasks.router, prefix="/api/v1/tasks", tags=["Tasks"])
+app.include_router(sync.router, prefix="/api/v1/sync", tags=["Sync"])
 
 
 @app.get("/")
@@ -72,27 +94,30 @@ async def root():
 
 
 @app.get("/health")
-async def health_check(db: Session = Depends(get_db)):
-    """Health check endpoint for Kubernetes readiness/liveness probes"""
-    try:
-        # Check database
-        db.execute("SELECT 1")
-
-        # Check Redis
-        redis_client = get_redis_client()
-        redis_client.ping()
-
-        return {
-            "status": "healthy",
-            "database": "connected",
-            "redis": "connected",
-            "version": "1.0.0"
-        }
-    except Exception as e:
-        raise HTTPException(
+async def health_check():
+    """Cached result of the background health prober, with per-dependency latency"""
+    status_code = status.HTTP_200_OK if health_prober.is_ready() else status.HTTP_503_SERVICE_UNAVAILABLE
+    return JSONResponse(
+        status_code=status_code,
+        content={**health_prober.result, "version": "1.0.0"}
+    )
+
+
+@app.get("/livez")
+async def liveness_check():
+    """Kubernetes liveness probe: the process is up and the event loop is responsive"""
+    return {"status": "alive"}
+
+
+@app.get("/readyz")
+async def readiness_check():
+    """Kubernetes readiness probe: dependencies are reachable and the DB pool is not exhausted"""
+    if not health_prober.is_ready():
+        return JSONResponse(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail=f"Service unhealthy: {str(e)}"
+            content={"status": "not ready", "dependencies": health_prober.result["dependencies"]}
         )
+    return {"status": "ready"}
 
 if __name__ == "__main__":
     import uvicorn
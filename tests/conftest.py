@@ -0,0 +1,49 @@
+import os
+import tempfile
+
+import pytest
+
+# Point the app at SQLite before app.database creates its engine
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/primary.db")
+os.environ.setdefault("REDIS_URL", "redis://127.0.0.1:1/0")
+
+
+@pytest.fixture
+def db():
+    """Session on a freshly created primary database"""
+    from app import models  # noqa: F401  (registers tables on Base)
+    from app.database import Base, SessionLocal, engine
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    """API client with Redis swapped for fakeredis"""
+    fakeredis = pytest.importorskip("fakeredis")
+    from fastapi.testclient import TestClient
+
+    from app.core import redis_client
+    from main import app
+
+    monkeypatch.setattr(redis_client, "_redis_client", fakeredis.FakeRedis(decode_responses=True))
+    return TestClient(app)
+
+
+@pytest.fixture
+def make_user(db):
+    """Create a user; returns (user, auth headers)"""
+    from app.models import User
+    from app.routers.auth import create_access_token
+
+    def make(name):
+        user = User(email=f"{name}@example.com", username=name, full_name=name.title(), hashed_password="x")
+        db.add(user)
+        db.commit()
+        return user, {"Authorization": f"Bearer {create_access_token(data={'sub': user.email})}"}
+
+    return make
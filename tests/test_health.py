@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine
+
+from app.core import health
+from app.core.health import HealthProber
+
+
+@pytest.fixture(autouse=True)
+def redis_up(monkeypatch):
+    monkeypatch.setattr(health, "_check_redis", lambda: None)
+
+
+@pytest.fixture
+def small_pool(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path}/pool.db", pool_size=1, max_overflow=0, pool_timeout=30)
+    monkeypatch.setattr(health, "engine", engine)
+    monkeypatch.setattr(health.settings, "DB_POOL_SIZE", 1)
+    monkeypatch.setattr(health.settings, "DB_MAX_OVERFLOW", 0)
+    return engine
+
+
+def test_healthy_probe_is_ready(small_pool):
+    prober = HealthProber(interval=5, timeout=1)
+    asyncio.run(prober.run_once())
+
+    assert prober.result["status"] == "healthy"
+    assert prober.result["dependencies"]["database"]["status"] == "up"
+    assert prober.is_ready()
+
+
+def test_hung_check_times_out_without_starving_other_probes(monkeypatch, small_pool):
+    release = threading.Event()
+    started = []
+
+    def hung_database():
+        started.append(1)
+        release.wait(5)
+
+    monkeypatch.setattr(health, "_check_database", hung_database)
+    prober = HealthProber(interval=5, timeout=0.05)
+
+    async def rounds():
+        results = []
+        for _ in range(5):
+            await prober.run_once()
+            results.append(prober.result["dependencies"])
+        return results
+
+    try:
+        results = asyncio.run(rounds())
+    finally:
+        release.set()
+
+    assert results[0]["database"]["error"] == "timed out after 0.05s"
+    # Later rounds are skipped while that check is still stuck, so threads don't pile up
+    assert len(started) == 1
+    assert all(r["database"]["error"] == "previous probe still running" for r in results[1:])
+    assert all(r["redis"]["status"] == "up" for r in results)
+    assert not prober.is_ready()
+
+
+def test_exhausted_pool_reports_not_ready_promptly(small_pool):
+    prober = HealthProber(interval=5, timeout=1)
+    with small_pool.connect():
+        started = time.perf_counter()
+        asyncio.run(prober.run_once())
+        elapsed = time.perf_counter() - started
+
+        assert elapsed < 1
+        assert prober.result["dependencies"]["database"]["status"] == "up"
+        assert prober.result["dependencies"]["pool"]["exhausted"]
+        assert not prober.is_ready()
+
+    asyncio.run(prober.run_once())
+    assert prober.is_ready()
+
+
+def test_stale_result_is_not_ready(small_pool):
+    prober = HealthProber(interval=5, timeout=1)
+    asyncio.run(prober.run_once())
+    prober.result["checked_at"] = time.time() - prober.interval * 3 - 1
+
+    assert prober.is_stale()
+    assert not prober.is_ready()
@@ -0,0 +1,41 @@
+import os
+import sqlite3
+
+from alembic import command
+from alembic.config import Config
+
+from app.core.config import settings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _alembic_config():
+    config = Config(os.path.join(ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT, "alembic"))
+    return config
+
+
+def test_upgrade_adds_version_and_backfills_change_seq(tmp_path, monkeypatch):
+    path = tmp_path / "existing.db"
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE projects (id INTEGER PRIMARY KEY, name TEXT);
+        CREATE TABLE tasks (id INTEGER PRIMARY KEY, title TEXT, project_id INTEGER);
+        CREATE TABLE comments (id INTEGER PRIMARY KEY, task_id INTEGER);
+        INSERT INTO projects VALUES (1, 'p');
+        INSERT INTO tasks VALUES (4, 't', 1);
+        INSERT INTO comments VALUES (9, 4);
+    """)
+    conn.commit()
+    conn.close()
+
+    # alembic/env.py takes its URL from settings
+    monkeypatch.setattr(settings, "DATABASE_URL", f"sqlite:///{path}")
+    command.upgrade(_alembic_config(), "head")
+
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT id, version, change_seq FROM tasks").fetchall() == [(4, 1, 4)]
+    assert conn.execute("SELECT change_seq FROM projects").fetchall() == [(1,)]
+    assert conn.execute("SELECT change_seq FROM comments").fetchall() == [(9,)]
+    assert conn.execute("SELECT count(*) FROM sync_tombstones").fetchone() == (0,)
+    conn.close()
@@ -0,0 +1,163 @@
+import ipaddress
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException, Response
+from starlette.requests import Request
+
+from app.core import rate_limit, redis_client
+from app.core.config import settings
+from app.database import PoolWaitTracker
+from app.models import User
+from app.routers import auth
+
+
+def _request(client_host, forwarded_for=None):
+    headers = [(b"x-forwarded-for", forwarded_for.encode())] if forwarded_for else []
+    return Request({"type": "http", "headers": headers, "client": (client_host, 12345)})
+
+
+@pytest.fixture(autouse=True)
+def trusted_vpc(monkeypatch):
+    monkeypatch.setattr(rate_limit, "_trusted_proxies", [ipaddress.ip_network("10.0.0.0/16")])
+
+
+def test_untrusted_peer_ignores_forwarded_header():
+    assert rate_limit.client_ip(_request("203.0.113.7", "198.51.100.1")) == "203.0.113.7"
+
+
+def test_trusted_proxy_uses_forwarded_client():
+    assert rate_limit.client_ip(_request("10.0.3.4", "198.51.100.1")) == "198.51.100.1"
+
+
+def test_forged_forwarded_entries_are_skipped():
+    # The client prepended a fake hop; the proxy appended the real address
+    request = _request("10.0.3.4", "1.2.3.4, 198.51.100.1, 10.0.9.9")
+    assert rate_limit.client_ip(request) == "198.51.100.1"
+
+
+def test_anonymous_principal_is_keyed_by_client_ip():
+    assert rate_limit._principal(_request("10.0.3.4", "198.51.100.1")) == "ip:198.51.100.1"
+
+
+@pytest.fixture
+def login_client(client, db, monkeypatch):
+    monkeypatch.setattr(rate_limit, "rate_limiter", rate_limit.RateLimiter(lease_fraction=0.05, lease_seconds=1.0))
+    monkeypatch.setitem(settings.RATE_LIMITS, "login_account", "3/hour")
+    # passlib's bcrypt backend is not what is under test here
+    monkeypatch.setattr(auth, "bcrypt", SimpleNamespace(verify=lambda password, hashed: password == hashed))
+    db.add(User(email="ada@example.com", username="ada", full_name="Ada", hashed_password="right"))
+    db.commit()
+    return client
+
+
+def _login(client, password):
+    return client.post("/api/v1/auth/login", json={"email": "ada@example.com", "password": password})
+
+
+def test_successful_logins_do_not_spend_the_account_bucket(login_client):
+    for _ in range(5):
+        response = _login(login_client, "right")
+        assert response.status_code == 200
+        # Headers report the per-IP login bucket, not the per-account one
+        assert response.headers["RateLimit-Limit"] == "10"
+
+
+def test_failed_logins_lock_the_account(login_client):
+    for _ in range(3):
+        assert _login(login_client, "wrong").status_code == 401
+
+    response = _login(login_client, "right")
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+    assert response.headers["RateLimit-Limit"] == "3"
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(redis_client, "_redis_client", client)
+    return client
+
+
+@pytest.fixture
+def limiter(redis, monkeypatch):
+    limiter = rate_limit.RateLimiter(lease_fraction=0.05, lease_seconds=1.0)
+    monkeypatch.setattr(rate_limit, "rate_limiter", limiter)
+    return limiter
+
+
+def test_limit_parse():
+    limit = rate_limit.Limit.parse("120/minute")
+    assert (limit.capacity, limit.period, limit.rate) == (120, 60, 2.0)
+
+
+def test_burst_across_workers_allows_exactly_the_capacity(redis):
+    workers = [rate_limit.RateLimiter(lease_fraction=0.05, lease_seconds=1.0) for _ in range(2)]
+    limit = rate_limit.Limit.parse("120/minute")
+
+    allowed = sum(workers[i % 2].hit("rate_limit:test:burst", limit)[0] for i in range(200))
+
+    assert allowed == 120
+
+
+def test_exceeding_the_limit_is_429_with_headers(limiter):
+    limit = rate_limit.Limit.parse("2/minute")
+    response = Response()
+    rate_limit.check_rate_limit("test", "ip:1.2.3.4", response, limit)
+    assert response.headers["RateLimit-Limit"] == "2"
+    assert response.headers["RateLimit-Remaining"] == "1"
+
+    rate_limit.check_rate_limit("test", "ip:1.2.3.4", Response(), limit)
+    with pytest.raises(HTTPException) as exc:
+        rate_limit.check_rate_limit("test", "ip:1.2.3.4", Response(), limit)
+
+    assert exc.value.status_code == 429
+    assert exc.value.headers["RateLimit-Remaining"] == "0"
+    assert 1 <= int(exc.value.headers["Retry-After"]) <= 30
+    # Other principals have their own bucket
+    rate_limit.check_rate_limit("test", "ip:5.6.7.8", Response(), limit)
+
+
+def test_peek_does_not_consume(limiter):
+    limit = rate_limit.Limit.parse("1/hour")
+    for _ in range(3):
+        rate_limit.check_rate_limit("test", "ip:1.2.3.4", limit=limit, consume=False)
+
+    rate_limit.check_rate_limit("test", "ip:1.2.3.4", limit=limit)
+    with pytest.raises(HTTPException):
+        rate_limit.check_rate_limit("test", "ip:1.2.3.4", limit=limit, consume=False)
+
+
+def test_redis_errors_fail_open(monkeypatch):
+    def unavailable():
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(rate_limit, "get_redis_client", unavailable)
+    monkeypatch.setattr(rate_limit, "rate_limiter", rate_limit.RateLimiter(lease_fraction=0.05, lease_seconds=1.0))
+    response = Response()
+
+    rate_limit.check_rate_limit("test", "ip:1.2.3.4", response, rate_limit.Limit.parse("1/hour"))
+
+    assert "RateLimit-Limit" not in response.headers
+
+
+def test_should_shed_load_follows_recent_pool_waits(monkeypatch):
+    tracker = PoolWaitTracker(window_seconds=10)
+    monkeypatch.setattr(rate_limit, "pool_wait_tracker", tracker)
+    monkeypatch.setattr(settings, "LOAD_SHED_POOL_WAIT_MS", 200)
+
+    assert not rate_limit.should_shed_load()
+    tracker.record(50)
+    assert not rate_limit.should_shed_load()
+
+    # Twice the threshold sheds everything
+    tracker = PoolWaitTracker(window_seconds=10)
+    tracker.record(400)
+    monkeypatch.setattr(rate_limit, "pool_wait_tracker", tracker)
+    assert rate_limit.should_shed_load()
+
+    # Samples older than the window no longer count
+    tracker._last_sample_at -= 11
+    assert not rate_limit.should_shed_load()
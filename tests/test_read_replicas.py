@@ -0,0 +1,130 @@
+import time
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from starlette.requests import Request
+
+from app import database, models  # noqa: F401  (registers tables on Base)
+from app.database import Base, LAST_WRITE_HEADER, ReplicaRouter
+
+
+def _request(headers=None):
+    raw = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    return Request({"type": "http", "headers": raw})
+
+
+def _read_session(request=None):
+    gen = database.get_read_db(request or _request())
+    return gen, next(gen)
+
+
+@pytest.fixture
+def primary(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path}/primary.db")
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "SessionLocal", database.sessionmaker(autoflush=False, bind=engine))
+    return engine
+
+
+@pytest.fixture
+def replicas(tmp_path, primary):
+    # Two read-only stand-ins sharing the primary's schema and data
+    url = f"sqlite:///file:{tmp_path}/primary.db?mode=ro&uri=true"
+    return [create_engine(url), create_engine(url + "&cache=private")]
+
+
+def _use_replicas(monkeypatch, engines):
+    router = ReplicaRouter(engines, retry_seconds=30)
+    monkeypatch.setattr(database, "replica_router", router)
+    return router
+
+
+def test_round_robin_across_replicas(monkeypatch, replicas):
+    _use_replicas(monkeypatch, replicas)
+
+    binds = []
+    for _ in range(4):
+        gen, db = _read_session()
+        db.execute(text("SELECT count(*) FROM projects"))
+        binds.append(db.get_bind())
+        gen.close()
+
+    assert binds == [replicas[0], replicas[1], replicas[0], replicas[1]]
+
+
+def test_unreachable_replica_fails_over_at_connect(monkeypatch, tmp_path, replicas):
+    dead = create_engine(f"sqlite:///{tmp_path}/missing/dir/replica.db")
+    router = _use_replicas(monkeypatch, [dead, replicas[0]])
+
+    gen, db = _read_session()
+    assert db.get_bind() is replicas[0]
+    gen.close()
+
+    assert router.candidates() == [replicas[0]]
+
+
+def test_replica_failing_at_query_time_retries_on_primary(monkeypatch, tmp_path, primary):
+    # Schema-less replica: connects fine, then fails with "no such table"
+    lagging = create_engine(f"sqlite:///{tmp_path}/lagging.db")
+    router = _use_replicas(monkeypatch, [lagging])
+
+    gen, db = _read_session()
+    assert db.execute(text("SELECT count(*) FROM projects")).scalar() == 0
+    assert db.get_bind() is primary
+    gen.close()
+
+    assert router.candidates() == []
+
+
+def test_all_replicas_down_falls_back_to_primary(monkeypatch, replicas, primary):
+    router = _use_replicas(monkeypatch, replicas)
+    for replica in replicas:
+        router.mark_down(replica)
+
+    gen, db = _read_session()
+    assert db.get_bind() is primary
+    gen.close()
+
+
+def test_recent_write_pins_reads_to_primary(monkeypatch, replicas, primary):
+    _use_replicas(monkeypatch, replicas)
+
+    gen, db = _read_session(_request({LAST_WRITE_HEADER: str(time.time())}))
+    assert db.get_bind() is primary
+    gen.close()
+
+    stale = time.time() - database.settings.REPLICA_PIN_SECONDS - 1
+    gen, db = _read_session(_request({LAST_WRITE_HEADER: str(stale)}))
+    assert db.get_bind() in replicas
+    gen.close()
+
+
+def test_query_failing_on_primary_too_keeps_replica_up(monkeypatch, replicas):
+    router = _use_replicas(monkeypatch, replicas[:1])
+
+    gen, db = _read_session()
+    with pytest.raises(OperationalError):
+        db.execute(text("SELECT * FROM no_such_table"))
+    gen.close()
+
+    assert router.candidates() == replicas[:1]
+
+
+def test_primary_reads_sample_pool_waits(monkeypatch, replicas, primary):
+    tracker = database.PoolWaitTracker(window_seconds=10)
+    monkeypatch.setattr(database, "pool_wait_tracker", tracker)
+
+    # No replicas configured, and a replica-backed read pinned to the primary
+    _use_replicas(monkeypatch, [])
+    gen, db = _read_session()
+    gen.close()
+    assert tracker.recent_average_ms() is not None
+
+    tracker = database.PoolWaitTracker(window_seconds=10)
+    monkeypatch.setattr(database, "pool_wait_tracker", tracker)
+    _use_replicas(monkeypatch, replicas)
+    gen, db = _read_session(_request({LAST_WRITE_HEADER: str(time.time())}))
+    gen.close()
+    assert tracker.recent_average_ms() is not None
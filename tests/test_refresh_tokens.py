@@ -0,0 +1,59 @@
+import pytest
+
+from app.core import redis_client, refresh_tokens
+from app.core.refresh_tokens import FAMILY_KEY, USER_FAMILIES_KEY, RefreshTokenError
+
+fakeredis = pytest.importorskip("fakeredis")
+
+SUBJECT = "a@example.com"
+
+
+@pytest.fixture(autouse=True)
+def redis(monkeypatch):
+    client = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(redis_client, "_redis_client", client)
+    return client
+
+
+def test_rotation_invalidates_previous_token():
+    family_id, jti = refresh_tokens.start_family(SUBJECT)
+    new_jti = refresh_tokens.rotate(SUBJECT, family_id, jti)
+
+    with pytest.raises(RefreshTokenError, match="reuse"):
+        refresh_tokens.rotate(SUBJECT, family_id, jti)
+    # Reuse revokes the whole family, including the token issued by the rotation
+    with pytest.raises(RefreshTokenError, match="revoked"):
+        refresh_tokens.rotate(SUBJECT, family_id, new_jti)
+    assert not refresh_tokens.is_active(family_id)
+
+
+def test_rotation_extends_the_user_family_set(redis):
+    family_id, jti = refresh_tokens.start_family(SUBJECT)
+    redis.expire(USER_FAMILIES_KEY.format(subject=SUBJECT), 5)
+
+    refresh_tokens.rotate(SUBJECT, family_id, jti)
+
+    assert redis.ttl(USER_FAMILIES_KEY.format(subject=SUBJECT)) > 5
+
+
+def test_logout_all_revokes_family_kept_alive_only_by_refreshing(redis):
+    family_id, jti = refresh_tokens.start_family(SUBJECT)
+    # The set outlived by the family, as when a user refreshes past the original TTL
+    redis.delete(USER_FAMILIES_KEY.format(subject=SUBJECT))
+    jti = refresh_tokens.rotate(SUBJECT, family_id, jti)
+
+    refresh_tokens.revoke_all(SUBJECT)
+
+    assert not refresh_tokens.is_active(family_id)
+    with pytest.raises(RefreshTokenError):
+        refresh_tokens.rotate(SUBJECT, family_id, jti)
+
+
+def test_revoke_family_removes_it_from_the_user_set(redis):
+    kept, _ = refresh_tokens.start_family(SUBJECT)
+    revoked, _ = refresh_tokens.start_family(SUBJECT)
+
+    refresh_tokens.revoke_family(SUBJECT, revoked)
+
+    assert redis.smembers(USER_FAMILIES_KEY.format(subject=SUBJECT)) == {kept}
+    assert not redis.exists(FAMILY_KEY.format(family_id=revoked))
@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import redis_client, scheduler
+from app.models import TaskStatus
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture(autouse=True)
+def redis(monkeypatch):
+    client = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(redis_client, "_redis_client", client)
+    return client
+
+
+def _task(due_in_minutes, status=TaskStatus.TODO):
+    due = datetime.utcnow() + timedelta(minutes=due_in_minutes)
+    return SimpleNamespace(id=1, project_id=7, due_date=due, status=status)
+
+
+def _overdue_events(redis):
+    return [fields for _, fields in redis.xrange(scheduler.EVENTS_STREAM) if fields["event"] == "task.overdue"]
+
+
+def test_task_created_overdue_is_announced_once(redis):
+    task = _task(-10)
+    scheduler.sync_task_schedule(task)
+    scheduler.run_once(100)
+
+    # Later status/PUT updates that keep the same past due date
+    scheduler.sync_task_schedule(task)
+    scheduler.sync_task_schedule(task)
+    scheduler.run_once(100)
+
+    assert len(_overdue_events(redis)) == 1
+
+
+def test_due_date_moved_into_the_past_is_announced_again(redis):
+    task = _task(-10)
+    scheduler.sync_task_schedule(task)
+    scheduler.run_once(100)
+
+    task.due_date -= timedelta(days=1)
+    scheduler.sync_task_schedule(task)
+    scheduler.run_once(100)
+
+    assert len(_overdue_events(redis)) == 2
+
+
+def test_future_task_fires_reminder_not_overdue(redis):
+    scheduler.sync_task_schedule(_task(scheduler.settings.DUE_REMINDER_LEAD_MINUTES + 30))
+    assert scheduler.run_once(100) == 0
+    assert redis.zcard(scheduler.OVERDUE_QUEUE_KEY) == 1
+    assert redis.zcard(scheduler.REMINDER_QUEUE_KEY) == 1
+
+
+def test_completed_task_leaves_the_index(redis):
+    task = _task(-10)
+    scheduler.sync_task_schedule(task)
+    task.status = TaskStatus.DONE
+    scheduler.sync_task_schedule(task)
+
+    assert scheduler.overdue_task_ids([7], 10) == []
+    assert scheduler.run_once(100) == 0
@@ -0,0 +1,104 @@
+import pytest
+
+from app.core.config import settings
+from app.models import Comment, Project, SyncTombstone, Task
+
+
+@pytest.fixture(autouse=True)
+def small_batches(monkeypatch):
+    monkeypatch.setattr(settings, "SYNC_BATCH_SIZE", 2)
+    monkeypatch.setattr(settings, "SYNC_SETTLE_SECONDS", 0)
+
+
+def _sync(client, headers, since=None):
+    params = {"since": since} if since is not None else {}
+    response = client.get("/api/v1/sync", params=params, headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def _sync_all(client, headers, since=None):
+    """Follow next_token until has_more is false; returns (entities seen, final token)"""
+    seen = []
+    for _ in range(50):
+        page = _sync(client, headers, since)
+        seen += [("project", p["id"]) for p in page["projects"]]
+        seen += [("task", t["id"]) for t in page["tasks"]]
+        seen += [("comment", c["id"]) for c in page["comments"]]
+        seen += [("deleted " + d["type"], d["id"]) for d in page["deleted"]]
+        since = page["next_token"]
+        if not page["has_more"]:
+            return seen, since
+    pytest.fail("sync did not finish")
+
+
+def test_paging_skips_and_repeats_nothing(client, db, make_user):
+    owner, headers = make_user("owner")
+    other, _ = make_user("other")
+
+    project = Project(name="Mine", created_by_id=owner.id, change_seq=1)
+    hidden = Project(name="Theirs", created_by_id=other.id, change_seq=3)
+    db.add_all([project, hidden])
+    db.flush()
+
+    # Three tasks share change_seq 5, more than a whole batch
+    seqs = [2, 3, 5, 5, 5, 8]
+    tasks = [Task(title=f"t{seq}", project_id=project.id, change_seq=seq) for seq in seqs]
+    db.add_all(tasks + [Task(title="hidden", project_id=hidden.id, change_seq=4)])
+    db.flush()
+
+    comments = [
+        Comment(content="c4", task_id=tasks[0].id, author_id=owner.id, change_seq=4),
+        Comment(content="c6", task_id=tasks[1].id, author_id=owner.id, change_seq=6),
+    ]
+    tombstones = [
+        SyncTombstone(entity_type="task", entity_id=100, project_id=project.id, change_seq=7),
+        SyncTombstone(entity_type="comment", entity_id=200, project_id=project.id, change_seq=9),
+        SyncTombstone(entity_type="task", entity_id=300, project_id=hidden.id, change_seq=9),
+    ]
+    db.add_all(comments + tombstones)
+    db.commit()
+
+    seen, token = _sync_all(client, headers)
+
+    expected = ([("project", project.id)] + [("task", task.id) for task in tasks] +
+                [("comment", comment.id) for comment in comments] +
+                [("deleted task", 100), ("deleted comment", 200)])
+    assert len(seen) == len(set(seen))
+    assert set(seen) == set(expected)
+    assert token == "9"
+
+    # Nothing new: an empty page that keeps the token
+    page = _sync(client, headers, token)
+    assert (page["tasks"], page["has_more"], page["next_token"]) == ([], False, "9")
+
+
+def test_members_see_deletions_of_a_deleted_project(client, db, make_user):
+    owner, _ = make_user("owner")
+    member, member_headers = make_user("member")
+    stranger, stranger_headers = make_user("stranger")
+
+    project = Project(name="Doomed", created_by_id=owner.id)
+    project.members.append(member)
+    db.add(project)
+    db.flush()
+    db.add_all([Task(title="a", project_id=project.id), Task(title="b", project_id=project.id)])
+    db.commit()
+    task_ids = [task.id for task in project.tasks]
+
+    seen, member_token = _sync_all(client, member_headers)
+    assert set(seen) == {("project", project.id)} | {("task", task_id) for task_id in task_ids}
+    _, stranger_token = _sync_all(client, stranger_headers)
+
+    # Deleting a task of a live project is only visible to people with access to it
+    db.delete(project.tasks[0])
+    db.commit()
+    assert _sync_all(client, stranger_headers, stranger_token)[0] == []
+
+    project_id = project.id
+    db.delete(project)
+    db.commit()
+
+    seen, _ = _sync_all(client, member_headers, member_token)
+    assert sorted(seen) == sorted([("deleted project", project_id)] +
+                                  [("deleted task", task_id) for task_id in task_ids])
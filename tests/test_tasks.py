@@ -0,0 +1,88 @@
+import pytest
+
+from app.models import Project, Task, TaskStatus
+
+
+@pytest.fixture
+def owner(make_user):
+    return make_user("owner")
+
+
+@pytest.fixture
+def task(db, owner):
+    project = Project(name="Launch", created_by_id=owner[0].id)
+    db.add(project)
+    db.commit()
+    task = Task(title="Write docs", project_id=project.id)
+    db.add(task)
+    db.commit()
+    return task
+
+
+def _patch_status(client, task_id, headers, status, if_match=None):
+    if if_match is not None:
+        headers = dict(headers, **{"If-Match": if_match})
+    return client.patch(f"/api/v1/tasks/{task_id}/status", json={"status": status}, headers=headers)
+
+
+def test_update_bumps_version_and_etag(client, owner, task):
+    response = _patch_status(client, task.id, owner[1], "in_progress", if_match='"1"')
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] == '"2"'
+    assert response.json()["version"] == 2
+    assert response.json()["project_name"] == "Launch"
+
+    response = client.put(f"/api/v1/tasks/{task.id}", json={"title": "Write more docs", "version": 2},
+                          headers=owner[1])
+    assert response.status_code == 200
+    assert response.json()["title"] == "Write more docs"
+    assert response.headers["ETag"] == '"3"'
+
+
+def test_stale_if_match_is_409_with_current_etag(client, owner, task):
+    assert _patch_status(client, task.id, owner[1], "in_progress", if_match='"1"').status_code == 200
+
+    response = _patch_status(client, task.id, owner[1], "review", if_match='"1"')
+
+    assert response.status_code == 409
+    assert response.headers["ETag"] == '"2"'
+    assert client.get(f"/api/v1/tasks/{task.id}", headers=owner[1]).json()["status"] == "in_progress"
+
+
+def test_non_member_is_403_and_task_is_unchanged(client, db, make_user, task):
+    _, stranger_headers = make_user("stranger")
+
+    response = _patch_status(client, task.id, stranger_headers, "done")
+
+    assert response.status_code == 403
+    db.refresh(task)
+    assert (task.status, task.version) == (TaskStatus.TODO, 1)
+
+
+def test_project_member_can_update(client, db, make_user, task):
+    member, member_headers = make_user("member")
+    task.project.members.append(member)
+    db.commit()
+
+    assert _patch_status(client, task.id, member_headers, "in_progress").status_code == 200
+
+
+def test_missing_task_is_404(client, owner):
+    assert _patch_status(client, 999, owner[1], "done").status_code == 404
+
+
+def test_malformed_if_match_is_400(client, owner, task):
+    assert _patch_status(client, task.id, owner[1], "done", if_match="not-a-version").status_code == 400
+
+
+def test_completed_at_is_set_on_done_and_kept_on_done_again(client, owner, task):
+    done = _patch_status(client, task.id, owner[1], "done").json()
+    assert done["completed_at"] is not None
+
+    again = _patch_status(client, task.id, owner[1], "done").json()
+    assert again["completed_at"] == done["completed_at"]
+    assert again["version"] == 3
+
+    reopened = _patch_status(client, task.id, owner[1], "todo").json()
+    assert reopened["completed_at"] is None